@@ -1,7 +1,7 @@
 import logging
 import json
-from collections import defaultdict
-from db import get_all_doctors
+from pathlib import Path
+from db import fetch_summary, fetch_shared_phones, fetch_multiple_location_doctors
 
 logging.basicConfig(
     level=logging.INFO,
@@ -10,6 +10,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def analyze_doctors():
     """
     Analyze doctor data to generate insights:
@@ -18,53 +23,52 @@ def analyze_doctors():
     3. Doctors having the same phone number
     4. Doctors with more than one location
     """
-    # Get all doctors from the database
-    doctors = get_all_doctors()
+    # Let the database do the counting and grouping
+    summary = fetch_summary()
+    total_doctors = summary.total_doctors
+    doctors_with_ratings = summary.doctors_with_ratings
+    doctors_with_shared_phones = fetch_shared_phones()
+    doctors_multiple_locations = fetch_multiple_location_doctors()
+    n_shared_phones = len(doctors_with_shared_phones)
+    n_multi = summary.doctors_with_multiple_locations
+    
+    # Percentage of all doctors; an empty table reports 0% instead of dividing by zero
+    pct = lambda n: 0.0 if not total_doctors else n / total_doctors * 100.0
     
     # 1. Total number of doctors
-    total_doctors = len(doctors)
     logger.info(f"Total number of doctors: {total_doctors}")
     
     # 2. Total number of doctors with ratings
-    doctors_with_ratings = [doc for doc in doctors if doc.rating and doc.rating > 0]
-    logger.info(f"Doctors with ratings: {len(doctors_with_ratings)} ({(len(doctors_with_ratings)/total_doctors*100):.1f}%)")
+    logger.info(f"Doctors with ratings: {doctors_with_ratings} ({pct(doctors_with_ratings):.1f}%)")
     
     # 3. Doctors having the same phone number
-    phone_map = defaultdict(list)
-    for doctor in doctors:
-        if doctor.phone:
-            phone_map[doctor.phone].append(doctor)
-    
-    doctors_with_shared_phones = {
-        phone: docs for phone, docs in phone_map.items() if len(docs) > 1
-    }
-    
-    logger.info(f"Found {len(doctors_with_shared_phones)} phone numbers shared by multiple doctors:")
-    for phone, docs in doctors_with_shared_phones.items():
-        logger.info(f"  Phone: {phone}")
-        for doc in docs:
-            logger.info(f"    - {doc.name} ({doc.specialty or 'No specialty listed'})")
+    logger.info(f"Found {n_shared_phones} phone numbers shared by multiple doctors:")
+    if logger.isEnabledFor(logging.INFO):
+        for phone, docs in doctors_with_shared_phones.items():
+            logger.info("  Phone: %s", phone)
+            for doc in docs:
+                logger.info("    - %s (%s)", doc.name, doc.specialty or "No specialty listed")
     
     # 4. Doctors with more than one location
-    doctors_multiple_locations = [doc for doc in doctors if doc.has_multiple_locations]
-    logger.info(f"Doctors with multiple locations: {len(doctors_multiple_locations)} ({(len(doctors_multiple_locations)/total_doctors*100):.1f}%)")
-    for doc in doctors_multiple_locations:
-        logger.info(f"  - {doc.name} ({doc.specialty or 'No specialty listed'})")
+    logger.info(f"Doctors with multiple locations: {n_multi} ({pct(n_multi):.1f}%)")
+    if logger.isEnabledFor(logging.INFO):
+        for doc in doctors_multiple_locations:
+            logger.info("  - %s (%s)", doc.name, doc.specialty or "No specialty listed")
     
     # Generate a summary report
     logger.info("SUMMARY REPORT:")
     logger.info(f"Total doctors: {total_doctors}")
-    logger.info(f"Doctors with ratings: {len(doctors_with_ratings)}")
-    logger.info(f"Number of shared phone numbers: {len(doctors_with_shared_phones)}")
-    logger.info(f"Doctors with multiple locations: {len(doctors_multiple_locations)}")
+    logger.info(f"Doctors with ratings: {doctors_with_ratings}")
+    logger.info(f"Number of shared phone numbers: {n_shared_phones}")
+    logger.info(f"Doctors with multiple locations: {n_multi}")
     
     # Create report data structure for JSON
     report_data = {
         "summary": {
             "total_doctors": total_doctors,
-            "doctors_with_ratings": len(doctors_with_ratings),
-            "shared_phone_numbers": len(doctors_with_shared_phones),
-            "doctors_with_multiple_locations": len(doctors_multiple_locations)
+            "doctors_with_ratings": doctors_with_ratings,
+            "shared_phone_numbers": n_shared_phones,
+            "doctors_with_multiple_locations": n_multi
         },
         "shared_phone_numbers": {},
         "doctors_with_multiple_locations": []
@@ -86,9 +90,14 @@ def analyze_doctors():
             "profile_url": doc.profile_url,
         })
     
-    # Export as JSON
-    with open("doctor_analysis_report.json", "w") as json_file:
-        json.dump(report_data, json_file, indent=2)
+    # Export as JSON, with orjson when it is installed. Both paths write
+    # UTF-8 with non-ASCII characters unescaped, so the bytes are the same.
+    report_path = Path("doctor_analysis_report.json")
+    if orjson is not None:
+        report_path.write_bytes(orjson.dumps(report_data, option=orjson.OPT_INDENT_2))
+    else:
+        with report_path.open("w", encoding="utf-8") as json_file:
+            json.dump(report_data, json_file, indent=2, ensure_ascii=False)
     logger.info("Analysis report exported as doctor_analysis_report.json")
     
     return report_data
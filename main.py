@@ -1,6 +1,8 @@
 
 import logging
-from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from functools import partial
 from typing import List, Optional
 
 from selenium import webdriver
@@ -9,7 +11,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-from db import init_db, save_doctor
+from db import ensure_schema, save_doctors_bulk
 from analyze import analyze_doctors
 
 logging.basicConfig(
@@ -19,10 +21,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Selectors and marker strings used while crawling, built once at import time
+_SEARCH_HOST_CSS = "#loyal-search"
+_SEL_SEARCH_HOST = (By.CSS_SELECTOR, _SEARCH_HOST_CSS)
+_SEL_PROVIDER_LINK = (By.CSS_SELECTOR, "a[href*='provider']")
+_SEL_RESULTS_TEXT = (By.CSS_SELECTOR, "span.text-md")
+_TEL_PREFIX = "tel:"
+_MULTI_LOC_MARKER = "+1 other location"
+_EMPLOYED = "Employed Provider"
+_ACCEPTS_NEW_PATIENTS = "Accepts New Patients"
 
+# Collects the fields of every doctor card inside the search shadow root.
+# Missing elements come back as null so a single call covers all cards.
+_EXTRACT_CARDS_SCRIPT = """
+const root = arguments[0];
+const text = (el) => (el ? el.innerText.trim() : null);
+return Array.from(root.querySelectorAll("div.list-item-content"), (card) => {
+    const url = card.querySelector("a[href*='/provider']");
+    const image = card.querySelector("div.provider-image img");
+    const phone = card.querySelector("a[href^='tel:']");
+    const rating = card.querySelector("div.loyal-stars[itemprop='aggregateRating']");
+    return {
+        name: text(card.querySelector("span[itemprop='name'], a span.link_provider_display_name")),
+        url: url ? url.href : null,
+        specialty: text(card.querySelector("span[itemprop='medicalSpecialty']")),
+        image_url: image ? image.src : null,
+        locations: text(card.querySelector("a[data-testref='provider-cards-location']")),
+        facility: text(card.querySelector("span[itemprop='name'][color='gray_800']")),
+        street: text(card.querySelector("span[itemprop='streetAddress']")),
+        phone: phone ? phone.getAttribute("href") : null,
+        badges: Array.from(card.querySelectorAll("div.styles__Badge-sc-o9cga9-6 span"), text),
+        rating: rating ? text(rating.querySelector("span[itemprop='ratingValue']")) : null,
+        rating_count: rating ? text(rating.querySelector("span[itemprop='ratingCount']")) : null,
+    };
+});
+"""
 
 
-@dataclass
+@dataclass(slots=True)
 class Doctor:
     """Data class to store comprehensive doctor information"""
     name: str
@@ -36,6 +72,9 @@ class Doctor:
     is_accepting_new_patients: bool = False
     rating: Optional[float] = 0
     rating_count: Optional[int] = 0
+
+# Field names used to flatten a Doctor into a plain dict for storage
+_DOCTOR_FIELDS = tuple(f.name for f in fields(Doctor))
     
 
 class AndalusiaHealthCrawler:
@@ -80,136 +119,69 @@ class AndalusiaHealthCrawler:
     def extract_doctor_info(self, shadow_root) -> List[Doctor]:
         """Extract comprehensive doctor information from shadow DOM"""
         doctors = []
+        seen_names = set()
         
-        # Find all doctor list item containers
-        doctor_containers = shadow_root.find_elements(By.CSS_SELECTOR, "div.list-item-content")
+        # Read every doctor card in a single WebDriver round trip
+        cards = self.driver.execute_script(_EXTRACT_CARDS_SCRIPT, shadow_root)
         
-        for container in doctor_containers:
+        for card in cards:
             try:
-                # Extract name
-                name_element = container.find_element(By.CSS_SELECTOR, "span[itemprop='name'], a span.link_provider_display_name")
-                name = name_element.text.strip() if name_element else "Unknown Doctor"
+                name = card["name"]
                 
-                # Extract URL if available
-                url_element = container.find_element(By.CSS_SELECTOR, "a[href*='/provider']")
-                url = url_element.get_attribute('href') if url_element else None
-                if url and not url.startswith('http'):
+                # profile_url is the upsert key; a card without one would be
+                # inserted again on every crawl, so skip it as before
+                url = card["url"]
+                if not url:
+                    raise ValueError(f"No profile link found for {name or 'unknown doctor'}")
+                if not url.startswith('http'):
                     url = self.BASE_URL + url
                 
-                # Extract specialty
-                specialty_element = container.find_element(By.CSS_SELECTOR, "span[itemprop='medicalSpecialty']")
-                specialty = specialty_element.text.strip() if specialty_element else None
+                # Cards without a specialty element were skipped before as well
+                specialty = card["specialty"]
+                if specialty is None:
+                    raise ValueError(f"No specialty found for {name or 'unknown doctor'}")
                 
-                # Extract image URL
-                image_url = None
-                try:
-                    img_element = container.find_element(By.CSS_SELECTOR, "div.provider-image img")
-                    image_url = img_element.get_attribute('src')
-                except:
-                    pass
+                # Combine facility name and address if both exist
+                facility_name = card["facility"]
+                street_address = card["street"]
+                if facility_name and street_address:
+                    location = f"{facility_name}: {street_address}"
+                else:
+                    location = street_address or facility_name
                 
-                # Extract location info
-                # Extract location info
-                location = None
-                facility_name = None
-                multiple_locations = False
-                try:
-                    # Check if doctor has multiple locations
-                    try:
-                        multiple_location_element = container.find_element(By.CSS_SELECTOR, "a[data-testref='provider-cards-location']")
-                        if multiple_location_element and "+1 other location" in multiple_location_element.text:
-                            multiple_locations = True
-                    except:
-                        pass
-                    
-                    # First try to get the facility/clinic name
-                    facility_element = container.find_element(By.CSS_SELECTOR, "span[itemprop='name'][color='gray_800']")
-                    facility_name = facility_element.text.strip() if facility_element else None
-                    
-                    # Then get the street address
-                    address_element = container.find_element(By.CSS_SELECTOR, "span[itemprop='streetAddress']")
-                    street_address = address_element.text.strip() if address_element else None
-                    
-                    # Combine facility name and address if both exist
-                    if facility_name and street_address:
-                        location = f"{facility_name}: {street_address}"
-                    elif street_address:
-                        location = street_address
-                    elif facility_name:
-                        location = facility_name
-                except Exception as e:
-                    logger.debug(f"Error extracting location: {str(e)}")
-                    pass
+                multiple_locations = _MULTI_LOC_MARKER in (card["locations"] or "")
                 
-                # Extract phone number
-                phone = None
-                try:
-                    phone_element = container.find_element(By.CSS_SELECTOR, "a[href^='tel:']")
-                    phone = phone_element.get_attribute('href').replace('tel:', '')
-                except:
-                    pass
+                # The script only matches href^='tel:', so the prefix is always present
+                phone = card["phone"][len(_TEL_PREFIX):] if card["phone"] else None
                 
+                # Badges carry the provider status information
                 employed_provider = False
                 accepts_new_patients = False
-                try:
-                    # Find badge elements that contain status information
-                    badge_elements = container.find_elements(By.CSS_SELECTOR, "div.styles__Badge-sc-o9cga9-6 span")
-                    for badge in badge_elements:
-                        badge_text = badge.text.strip()
-                        if "Employed Provider" in badge_text:
-                            employed_provider = True
-                        if "Accepts New Patients" in badge_text:
-                            accepts_new_patients = True
-                except Exception as e:
-                    logger.debug(f"Error extracting provider status: {str(e)}")
-                    pass
-                
-                employed_provider = False
-                accepts_new_patients = False
-                try:
-                    # Find badge elements that contain status information
-                    badge_elements = container.find_elements(By.CSS_SELECTOR, "div.styles__Badge-sc-o9cga9-6 span")
-                    for badge in badge_elements:
-                        badge_text = badge.text.strip()
-                        if "Employed Provider" in badge_text:
-                            employed_provider = True
-                        if "Accepts New Patients" in badge_text:
-                            accepts_new_patients = True
-                except Exception as e:
-                    logger.debug(f"Error extracting provider status: {str(e)}")
-                    pass
+                for badge_text in card["badges"]:
+                    if _EMPLOYED in badge_text:
+                        employed_provider = True
+                    if _ACCEPTS_NEW_PATIENTS in badge_text:
+                        accepts_new_patients = True
                 
                 # Extract ratings if available
                 rating = None
                 rating_count = None
                 try:
-                    # Look for rating container
-                    rating_element = container.find_element(By.CSS_SELECTOR, "div.loyal-stars[itemprop='aggregateRating']")
-                    if rating_element:
-                        # Extract rating value
-                        rating_value_element = rating_element.find_element(By.CSS_SELECTOR, "span[itemprop='ratingValue']")
-                        if rating_value_element:
-                            rating_text = rating_value_element.text
-                            # Extract just the numeric rating (e.g., "4.8" from "4.8 / 5")
-                            rating = float(rating_text.split('/')[0].strip())
-                        
-                        # Extract rating count
-                        rating_count_element = rating_element.find_element(By.CSS_SELECTOR, "span[itemprop='ratingCount']")
-                        if rating_count_element:
-                            count_text = rating_count_element.text.strip()
-                            # Extract just the number from "(194)"
-                            rating_count = int(count_text.strip('()'))
-                except Exception as e:
-                    # Rating information not available or couldn't be extracted
+                    if card["rating"]:
+                        # Extract just the numeric rating (e.g., "4.8" from "4.8 / 5")
+                        rating = float(card["rating"].split('/')[0].strip())
+                    if card["rating_count"]:
+                        # Extract just the number from "(194)"
+                        rating_count = int(card["rating_count"].strip('()'))
+                except ValueError as e:
                     logger.debug(f"Error extracting ratings: {str(e)}")
-                    pass
                 
                 # Create enhanced Doctor object
                 doctor = Doctor(
                     name=name, 
                     specialty=specialty,
                     profile_url=url, 
-                    image_url=image_url,
+                    image_url=card["image_url"],
                     location=location,
                     phone=phone,
                     is_employed_provider=employed_provider,
@@ -219,7 +191,8 @@ class AndalusiaHealthCrawler:
                     rating_count=rating_count
                 )
                 
-                if name and name not in [d.name for d in doctors]:
+                if name and name not in seen_names:
+                    seen_names.add(name)
                     doctors.append(doctor)
             except Exception as e:
                 logger.error(f"Error extracting doctor info: {str(e)}")
@@ -227,27 +200,27 @@ class AndalusiaHealthCrawler:
             
         return doctors
     
-    def crawl(self) -> List[Doctor]:
-        """Main crawling method to retrieve doctor information"""
+    def crawl(self, url: Optional[str] = None) -> List[Doctor]:
+        """Main crawling method to retrieve doctor information from one results page"""
         self.driver = self.setup_driver()
         doctors = []
         
         try:
-            logger.info("Loading search page...")
-            self.driver.get(self.SEARCH_URL)
+            logger.info(f"Loading search page {url or self.SEARCH_URL}...")
+            self.driver.get(url or self.SEARCH_URL)
             
             # Wait for main content to load
             WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "#loyal-search"))
+                EC.presence_of_element_located(_SEL_SEARCH_HOST)
             )
             
             # Get shadow root
-            shadow_root = self.get_shadow_root("#loyal-search")
+            shadow_root = self.get_shadow_root(_SEARCH_HOST_CSS)
             
             # Wait for doctor cards to load within shadow DOM
             WebDriverWait(self.driver, 20).until(
-                lambda d: shadow_root.find_elements(By.CSS_SELECTOR, "a[href*='provider']") or 
-                          shadow_root.find_elements(By.CSS_SELECTOR, "span.text-md")
+                lambda d: shadow_root.find_elements(*_SEL_PROVIDER_LINK) or 
+                          shadow_root.find_elements(*_SEL_RESULTS_TEXT)
             )
             
             # Extract doctor information
@@ -265,21 +238,33 @@ class AndalusiaHealthCrawler:
             if self.driver:
                 self.driver.quit()
 
-def main():
+def _crawl_one(url: str, headless: bool = True) -> List[dict]:
+    """Crawl a single results page with its own browser, returning picklable dicts"""
+    crawler = AndalusiaHealthCrawler(headless=headless)
+    return [{k: getattr(doctor, k) for k in _DOCTOR_FIELDS} for doctor in crawler.crawl(url)]
+
+def main(page_urls: Optional[List[str]] = None, max_workers: int = 4, headless: bool = True):
     """Main entry point for the crawler"""
     logger.info("Starting Andalusia Health doctor search...")
-    session = init_db()
-    session.close()
-    crawler = AndalusiaHealthCrawler(headless=True)
-    doctors = crawler.crawl()
-    logger.info(f"Found {len(doctors)} doctors:")
+    ensure_schema()
+    page_urls = page_urls or [AndalusiaHealthCrawler.SEARCH_URL]
+    seen_names = set()
+    
+    # Each worker process drives its own Chrome instance
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(page_urls))) as executor:
+        for batch in executor.map(partial(_crawl_one, headless=headless), page_urls):
+            # Workers only de-duplicate within their own page, so drop doctors
+            # already seen on an earlier page
+            doctors = []
+            for doctor in batch:
+                if doctor["name"] not in seen_names:
+                    seen_names.add(doctor["name"])
+                    doctors.append(doctor)
+            logger.info(f"Found {len(doctors)} doctors")
+            # Upsert each page of doctors in one statement
+            saved = save_doctors_bulk(doctors)
+            logger.info(f"Saved {saved} doctors")
     
-    for doctor in doctors:
-        # Convert dataclass to dictionary for database storage
-        doctor_dict = asdict(doctor)
-        doctor_id = save_doctor(doctor_dict)
-        logger.info(f"Saved doctor: {doctor.name} (ID: {doctor_id})")
-        
     analyze_doctors()
     logger.info("Doctor search completed")
     